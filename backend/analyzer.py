@@ -1,37 +1,96 @@
 # analyzer.py
-import numpy as np
-from sklearn.ensemble import IsolationForest
+import os
+import random
+import threading
+import time
+
+import joblib
+
+from detector import predict_from_scores
+from train_model import RESERVOIR_PATH, build_forest, load_reservoir, reservoir_update, save_model
+
+MODEL_PATH = os.path.join(
+    os.path.dirname(__file__),
+    "models/process_anomaly_forest.joblib"
+)
+# train_model.py 保存的历史样本蓄水池
+HISTORY_PATH = os.path.join(os.path.dirname(__file__), RESERVOIR_PATH)
+
+# 历史样本少于 MIN_HISTORY 行时不训练；之后每隔 REFIT_INTERVAL 秒用累计的历史重新训练
+MIN_HISTORY = 1000
+REFIT_INTERVAL = 3600
 
 
 class ProcessAnomalyDetector:
-    def __init__(self):
-        self.model = IsolationForest(
-            contamination=0.1,
-            random_state=42
-        )
-
-    def detect(self, processes):
-        if len(processes) < 10:
-            for p in processes:
-                p["anomaly"] = False
-                p["score"] = 0.0
-            return processes
-
-        features = []
-        for p in processes:
-            features.append([
-                p["cpu"],
-                p["memory"],
-                p["threads"],
-                p["nice"]
-            ])
-
-        X = np.array(features)
-        preds = self.model.fit_predict(X)
-        scores = self.model.decision_function(X)
-
-        for i, p in enumerate(processes):
-            p["anomaly"] = (preds[i] == -1)
-            p["score"] = float(scores[i])
-
-        return processes
+    def __init__(self, model_path=MODEL_PATH, history_path=HISTORY_PATH):
+        self.model = None
+        self.model_path = model_path
+        # 请求中的样本也并入历史蓄水池，定期重训时使用
+        self.history, self.seen = load_reservoir(history_path)
+        self._rng = random.Random()
+        self._last_fit = None
+        # 首次请求时 cpu_percent 全为 0，这批样本不计入历史
+        self._primed = False
+        # 多线程服务下，历史蓄水池和模型的更新需要互斥
+        self.lock = threading.Lock()
+
+    def warmup(self, X_hist):
+        """
+        在历史样本上训练并持久化，之后的请求只做打分
+        """
+        model = build_forest(len(X_hist))
+        model.fit(X_hist)
+        self.model = model
+        self._last_fit = time.monotonic()
+        # 其他 worker 以 mmap 方式读取该文件，只能整体替换不能原地重写
+        save_model(model, self.model_path)
+
+    def _ensure_model(self):
+        """优先加载磁盘上的模型，历史样本足够时按间隔重新训练"""
+        if self.model is None and os.path.exists(self.model_path):
+            self.model = joblib.load(self.model_path, mmap_mode="r")
+            self._last_fit = time.monotonic()
+
+        stale = self._last_fit is None or time.monotonic() - self._last_fit > REFIT_INTERVAL
+        history = self.history[:min(self.seen, len(self.history))]
+        if stale and len(history) >= MIN_HISTORY:
+            self.warmup(history)
+        return self.model is not None
+
+    def detect(self, meta, X):
+        """
+        meta: [(pid, name), ...]
+        X: collector 返回的 (n, 4) 特征数组
+        """
+        results = [
+            {
+                "pid": int(pid),
+                "name": name,
+                "cpu": float(X[i, 0]),
+                "memory": float(X[i, 1]),
+                "threads": int(X[i, 2]),
+                "nice": int(X[i, 3]),
+                "anomaly": False,
+                "score": 0.0,
+            }
+            for i, (pid, name) in enumerate(meta)
+        ]
+
+        with self.lock:
+            if self._primed:
+                self.seen = reservoir_update(self.history, self.seen, X, self._rng)
+            self._primed = True
+            # 没有模型且历史样本不足时只返回原始指标，不在单批请求上训练
+            model = self.model if len(results) >= 10 and self._ensure_model() else None
+
+        if model is None:
+            return results
+
+        scores = model.decision_function(X)
+        preds = predict_from_scores(scores)
+
+        for i, r in enumerate(results):
+            r["anomaly"] = bool(preds[i] == -1)
+            r["score"] = float(scores[i])
+
+        return results
@@ -5,11 +5,15 @@
 
 from fastapi import FastAPI, Query
 from typing import Dict
+from array import array
+from collections import Counter
+import numpy as np
 import psutil
 import uvicorn
 import os
 from datetime import datetime
-import time
+import asyncio
+import atexit
 
 from process_classifier import ProcessClassifier
 from label_manager import LabelManager
@@ -25,6 +29,11 @@ else:
     classifier = ProcessClassifier()
 
 label_manager = LabelManager()
+atexit.register(label_manager.flush)
+
+# 跨请求复用的 Process 句柄，cpu_percent 基于上一次调用的快照计算增量
+_proc_handles: Dict[int, psutil.Process] = {}
+CPU_SAMPLE_INTERVAL = 0.1
 
 
 # ==================== 核心接口（GET版本） ====================
@@ -45,36 +54,29 @@ async def classify_and_tag_processes(
     http://localhost:8000/api/classify-processes?limit=20
     """
     try:
-        # 1. 获取进程基本信息
-        processes = []
+        # 1. 获取进程基本信息（按列收集，最终结果才组装为字典）
+        pids = []
+        names = []
+        mems = array('d')
         # 第一次快速收集
         for proc in psutil.process_iter(['pid', 'name', 'memory_percent']):
-            try:
-                processes.append({
-                    'pid': proc.info['pid'],
-                    'name': proc.info['name'] or 'unknown',
-                    'cpu': 0.0,
-                    'memory': float(proc.info['memory_percent'] or 0.0)
-                })
-                if len(processes) >= limit:
-                    break
-            except:
-                continue
+            pids.append(proc.info['pid'])
+            names.append(proc.info['name'] or 'unknown')
+            mems.append(proc.info['memory_percent'] or 0.0)
+            if len(pids) >= limit:
+                break
 
         # 第二次获取真实的CPU使用率
-        for p in processes:
-            try:
-                proc = psutil.Process(p['pid'])
-                p['cpu'] = float(proc.cpu_percent(interval=0.01))
-            except:
-                continue
+        cpus = await sample_cpu_percent(pids)
 
         # 2. 智能分类
-        classified_results = classifier.batch_classify(processes[:limit])
+        classified_results = classifier.classify_arrays(pids, names, cpus, mems)
 
         # 3. 合并标签信息
         final_results = []
         for result in classified_results:
+            # 响应中需要追加标签字段，转换为字典
+            result = result._asdict()
             pid = result.get('pid')
             if pid:
                 labels = label_manager.get_process_labels(pid)
@@ -83,13 +85,10 @@ async def classify_and_tag_processes(
             else:
                 result['user_labels'] = []
                 result['is_tagged'] = False
-
-            # 添加可视化标识
-            result['visual_hint'] = get_visual_hint(result)
             final_results.append(result)
 
-        # 4. 统计信息
-        stats = calculate_statistics(final_results)
+        # 4. 可视化标识与统计信息
+        stats = build_response_arrays(final_results)
 
         return {
             "success": True,
@@ -111,104 +110,157 @@ async def classify_and_tag_processes(
         }
 
 
-def get_visual_hint(process_info: Dict) -> Dict:
-    """为进程生成可视化标识"""
-    category = process_info.get('category', 'unknown')
-    cpu = process_info.get('cpu_usage', 0)
-    memory = process_info.get('memory_usage', 0)
-
-    color_map = {
-        'system_critical': 'red',
-        'network_services': 'blue',
-        'user_applications': 'green',
-        'development_tools': 'cyan',
-        'security_services': 'orange',
-        'cpu_intensive': 'orange',
-        'memory_intensive': 'purple',
-    }
+def _read_cpu_percent(proc: psutil.Process):
+    try:
+        return float(proc.cpu_percent(None))
+    except psutil.Error:
+        return None
 
-    color = 'gray'
-    user_labels = process_info.get('user_labels', [])
 
-    if 'high_priority' in user_labels:
-        color = 'darkred'
-    elif 'monitor_closely' in user_labels:
-        color = 'orange'
-    elif category in color_map:
-        color = color_map[category]
+async def sample_cpu_percent(pids: list) -> array:
+    """
+    批量采样 CPU 使用率，返回与 pids 按下标对应的数组（无法读取的进程为 0.0）
+    已缓存的句柄直接读取增量；只有出现新进程时才统一等待一次采样间隔
+    cpu_percent(None) 只读一次 /proc/<pid>/stat，顺序读取比分发到线程池更快
+    """
+    global _proc_handles
 
-    if cpu > 70 and color == 'gray':
-        color = 'orange'
-    if memory > 50 and color == 'gray':
-        color = 'purple'
+    handles = {}
+    new_handles = []
+    for pid in pids:
+        proc = _proc_handles.get(pid)
+        if proc is None:
+            try:
+                proc = psutil.Process(pid)
+            except psutil.Error:
+                continue
+            new_handles.append(proc)
+        handles[pid] = proc
 
-    return {
-        "color": color,
-        "icon": get_category_icon(category),
-        "priority": calculate_priority(process_info)
-    }
+    if new_handles:
+        # 首次调用返回 0.0，仅建立基准
+        for proc in new_handles:
+            _read_cpu_percent(proc)
+        await asyncio.sleep(CPU_SAMPLE_INTERVAL)
 
+    sampled = list(handles)
+    readings = [_read_cpu_percent(handles[pid]) for pid in sampled]
 
-def get_category_icon(category: str) -> str:
-    """获取分类对应的图标建议"""
-    icons = {
-        'system_critical': '🔴',
-        'network_services': '🌐',
-        'user_applications': '💻',
-        'background_workers': '⚙️',
-        'development_tools': '🔧',
-        'security_services': '🔒',
-        'cpu_intensive': '🔥',
-        'memory_intensive': '💾',
-        'idle_process': '💤',
-        'unknown': '❓'
-    }
-    return icons.get(category, '❓')
+    cpu_by_pid = {}
+    for pid, cpu in zip(sampled, readings):
+        if cpu is None:
+            handles.pop(pid)
+        else:
+            cpu_by_pid[pid] = cpu
 
+    # 只保留本次仍存在的进程句柄
+    _proc_handles = handles
 
-def calculate_priority(process_info: Dict) -> int:
-    priority = 5
+    return array('d', (cpu_by_pid.get(pid, 0.0) for pid in pids))
 
-    user_labels = process_info.get('user_labels', [])
-    if 'high_priority' in user_labels:
-        priority = 9
-    elif 'business_critical' in user_labels:
-        priority = 8
 
-    category = process_info.get('category', '')
-    if category == 'system_critical':
-        priority = max(priority, 9)
+COLOR_MAP = {
+    'system_critical': 'red',
+    'network_services': 'blue',
+    'user_applications': 'green',
+    'development_tools': 'cyan',
+    'security_services': 'orange',
+    'cpu_intensive': 'orange',
+    'memory_intensive': 'purple',
+}
 
-    cpu = process_info.get('cpu_usage', 0)
-    if cpu > 80:
-        priority = max(priority, 8)
+# 颜色决策表：按 (用户标签, 分类, CPU 是否偏高, 内存是否偏高) 打包成整数，启动时穷举生成
+CAT_ID = {category: i + 1 for i, category in enumerate(COLOR_MAP)}  # 0 表示其他分类
+N_CAT = len(CAT_ID) + 1
+LABEL_NONE, LABEL_MONITOR, LABEL_HIGH = 0, 1, 2
 
-    return min(priority, 10)
 
+def _decide_color(label_flag: int, category, cpu_high: bool, mem_high: bool) -> str:
+    if label_flag == LABEL_HIGH:
+        color = 'darkred'
+    elif label_flag == LABEL_MONITOR:
+        color = 'orange'
+    else:
+        color = COLOR_MAP.get(category, 'gray')
+
+    if cpu_high and color == 'gray':
+        color = 'orange'
+    if mem_high and color == 'gray':
+        color = 'purple'
+    return color
 
-def calculate_statistics(processes: list) -> Dict:
-    stats = {
-        "by_category": {},
-        "tagged_processes": 0,
-        "cpu_intensive": 0,
-        "memory_intensive": 0
-    }
 
-    for proc in processes:
-        category = proc.get('category', 'unknown')
-        stats["by_category"][category] = stats["by_category"].get(category, 0) + 1
+def _color_code(label_flag, cat_id, cpu_high, mem_high):
+    return ((label_flag * N_CAT + cat_id) * 2 + cpu_high) * 2 + mem_high
 
-        if proc.get('is_tagged', False):
-            stats["tagged_processes"] += 1
 
-        cpu = proc.get('cpu_usage', 0)
-        memory = proc.get('memory_usage', 0)
-        if cpu > 70:
-            stats["cpu_intensive"] += 1
-        if memory > 30:
-            stats["memory_intensive"] += 1
+_ID_CAT = {i: category for category, i in CAT_ID.items()}
+COLOR_LUT = np.empty(3 * N_CAT * 4, dtype=object)
+for _label in (LABEL_NONE, LABEL_MONITOR, LABEL_HIGH):
+    for _cat in range(N_CAT):
+        for _cpu in (0, 1):
+            for _mem in (0, 1):
+                COLOR_LUT[_color_code(_label, _cat, _cpu, _mem)] = _decide_color(
+                    _label, _ID_CAT.get(_cat), _cpu, _mem)
 
-    return stats
+CATEGORY_ICONS = {
+    'system_critical': '🔴',
+    'network_services': '🌐',
+    'user_applications': '💻',
+    'background_workers': '⚙️',
+    'development_tools': '🔧',
+    'security_services': '🔒',
+    'cpu_intensive': '🔥',
+    'memory_intensive': '💾',
+    'idle_process': '💤',
+    'unknown': '❓'
+}
+
+
+def build_response_arrays(processes: list) -> Dict:
+    """
+    一次遍历完成可视化标识、优先级和统计信息
+    为每个进程写入 visual_hint，返回统计结果
+    """
+    n = len(processes)
+    cpu_arr = np.fromiter((p.get('cpu_usage', 0) for p in processes), dtype=np.float64, count=n)
+    mem_arr = np.fromiter((p.get('memory_usage', 0) for p in processes), dtype=np.float64, count=n)
+    categories = [p.get('category', 'unknown') for p in processes]
+    user_labels = [p.get('user_labels', []) for p in processes]
+
+    high_priority = np.fromiter(('high_priority' in l for l in user_labels), dtype=bool, count=n)
+    monitor_closely = np.fromiter(('monitor_closely' in l for l in user_labels), dtype=bool, count=n)
+    business_critical = np.fromiter(('business_critical' in l for l in user_labels), dtype=bool, count=n)
+    system_critical = np.fromiter((c == 'system_critical' for c in categories), dtype=bool, count=n)
+    tagged = np.fromiter((p.get('is_tagged', False) for p in processes), dtype=bool, count=n)
+
+    cpu_intensive_mask = cpu_arr > 70
+    mem_intensive_mask = mem_arr > 30
+
+    # 颜色：打包决策条件后直接查表
+    label_flag = np.where(high_priority, LABEL_HIGH, np.where(monitor_closely, LABEL_MONITOR, LABEL_NONE))
+    cat_ids = np.fromiter((CAT_ID.get(c, 0) for c in categories), dtype=np.intp, count=n)
+    color = COLOR_LUT[_color_code(label_flag, cat_ids, cpu_intensive_mask, mem_arr > 50)]
+
+    # 优先级
+    priority = np.full(n, 5, dtype=np.int8)
+    priority[business_critical] = 8
+    priority[high_priority | system_critical] = 9
+    priority = np.where(cpu_arr > 80, np.maximum(priority, 8), priority)
+
+    for i, p in enumerate(processes):
+        p['visual_hint'] = {
+            "color": str(color[i]),
+            "icon": CATEGORY_ICONS.get(categories[i], '❓'),
+            "priority": int(priority[i])
+        }
+
+    return {
+        "by_category": dict(Counter(categories)),
+        "tagged_processes": int(tagged.sum()),
+        "cpu_intensive": int(cpu_intensive_mask.sum()),
+        "memory_intensive": int(mem_intensive_mask.sum())
+    }
 
 
 # ==================== 启动 ====================
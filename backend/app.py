@@ -1,8 +1,23 @@
+import os
+
+# 必须在导入 sklearn / detector 之前打补丁；AMD 等平台可设置 USE_SKLEARNEX=0 关闭
+if os.environ.get("USE_SKLEARNEX", "1") == "1":
+    try:
+        from sklearnex import patch_sklearn
+        patch_sklearn()
+    except ImportError:
+        pass
+
 from flask import Flask, jsonify, request
 from collector import collect_processes
 from detector import AnomalyDetector
 from prophet import Prophet
 from monitor import ResourceMonitor
+import logging
+
+# 禁用 Prophet 的繁琐日志
+logging.getLogger('prophet').setLevel(logging.ERROR)
+logging.getLogger('cmdstanpy').setLevel(logging.ERROR)
 
 
 app = Flask(__name__)
@@ -18,8 +33,8 @@ def index():
 
 @app.route("/api/processes")
 def get_processes():
-    processes = collect_processes()
-    analyzed = detector.detect(processes)
+    meta, X = collect_processes()
+    analyzed = detector.detect(meta, X)
     return jsonify(analyzed)
 
 @app.route("/predict/<int:pid>")
@@ -30,9 +45,8 @@ def predict(pid):
     """
     metric_type = request.args.get('metric', 'cpu')
     
-    with monitor.lock:
-        # 获取特定 PID 的历史数据 
-        df = monitor.history[monitor.history['pid'] == pid].copy()
+    # 获取特定 PID 的历史数据
+    df = monitor.snapshot(pid)
     
     # Prophet 至少需要一定数量的数据点才能预测
     if len(df) < 10:
@@ -73,4 +87,6 @@ def predict(pid):
     
 
 if __name__ == "__main__":
-    app.run()
\ No newline at end of file
+    # 多线程 WSGI 服务器，慢请求不再阻塞后续请求
+    from waitress import serve
+    serve(app, host="127.0.0.1", port=5000, threads=8)
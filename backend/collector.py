@@ -1,31 +1,35 @@
+import numpy as np
 import psutil
 
+# 特征列顺序: cpu / memory / threads / nice
+N_FEATURES = 4
+
 
 def collect_processes(limit=100):
-    processes = []
+    """
+    返回 (meta, features)
+    meta: [(pid, name), ...]
+    features: 形状为 (n, 4) 的 float32 数组，与 meta 按行对应
+    """
+    meta = []
+    feats = np.empty((limit, N_FEATURES), dtype=np.float32)
+    n = 0
 
-    for proc in psutil.process_iter(
-        ['pid', 'name', 'cpu_percent', 'memory_percent', 'num_threads', 'nice']
-    ):
+    for proc in psutil.process_iter(['pid', 'name']):
         try:
-            p = {
-                "pid": proc.pid,
-                "name": proc.info["name"],
-                "cpu": float(proc.info["cpu_percent"]),
-                "memory": float(proc.info["memory_percent"]),
-                "threads": int(proc.info["num_threads"]),
-                "nice": int(proc.info["nice"]),
-            }
-            p["features"] = [
-                p["cpu"],
-                p["memory"],
-                p["threads"],
-                p["nice"]
-            ]
-            processes.append(p)
-            if len(processes) >= limit:
+            # oneshot 内多个属性共用同一次 /proc 读取
+            with proc.oneshot():
+                feats[n] = (
+                    proc.cpu_percent(None),
+                    proc.memory_percent(),
+                    proc.num_threads(),
+                    proc.nice(),
+                )
+            meta.append((proc.pid, proc.info["name"]))
+            n += 1
+            if n >= limit:
                 break
-        except psutil.NoSuchProcess:
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
             continue
 
-    return processes
+    return meta, feats[:n]
@@ -44,92 +44,141 @@
 #         return results
 
 import joblib
+import numpy as np
 import os
-import random
+
+from jit import njit
 
 MODEL_PATH = os.path.join(
     os.path.dirname(__file__),
     "models/isolation_forest.joblib"
 )
 
+# 解释编码: 低 4 位为规则判定位，高 2 位为异常来源
+CPU_HIGH = 1        # cpu > 80
+CPU_ELEVATED = 2    # cpu > 20
+MEMORY_HIGH = 4     # memory > 5
+THREADS_HIGH = 8    # threads > 50
+SOURCE_SHIFT = 4
+
+# 异常来源编码
+SOURCE_NORMAL = 0
+SOURCE_MODEL = 1
+SOURCE_RANDOM = 2
+
+
+def _rule_reasons(mask):
+    """基于规则的解释（无论是否异常都给）"""
+    reasons = []
+    if mask & CPU_HIGH:
+        reasons.append("CPU 使用率较高，需关注运行状态")
+    elif mask & CPU_ELEVATED:
+        reasons.append("CPU 使用率处于正常偏高区间")
+    else:
+        reasons.append("CPU 使用率正常")
+
+    if mask & MEMORY_HIGH:
+        reasons.append("内存占用偏高")
+    else:
+        reasons.append("内存占用正常")
+
+    if mask & THREADS_HIGH:
+        reasons.append("线程数较多，可能存在并发压力")
+    else:
+        reasons.append("线程数处于合理范围")
+    return reasons
+
+
+# 异常来源说明（关键！）
+SOURCE_REASONS = {
+    SOURCE_NORMAL: ("进程行为符合系统正常运行模式",),
+    SOURCE_MODEL: ("行为模式与大多数进程显著不同，判定异常",),
+    SOURCE_RANDOM: ("存在潜在异常风险",),
+}
+
+# 全部 2^6 种解释在导入时生成，各行共享同一个不可变元组
+REASON_TABLE = [
+    tuple(_rule_reasons(code & 0xF)) + SOURCE_REASONS.get(code >> SOURCE_SHIFT, ())
+    for code in range(64)
+]
+
+
+@njit(cache=True)
+def classify(cpu, memory, threads, preds, rand_mask):
+    """
+    批量判定异常并生成解释编码
+    返回 (anomaly_mask, reason_codes)
+    """
+    n = cpu.shape[0]
+    anomaly = np.empty(n, dtype=np.bool_)
+    codes = np.empty(n, dtype=np.uint8)
+
+    for i in range(n):
+        if preds[i] == -1:
+            anomaly[i] = True
+            source = SOURCE_MODEL
+        elif rand_mask[i]:
+            anomaly[i] = True
+            source = SOURCE_RANDOM
+        else:
+            anomaly[i] = False
+            source = SOURCE_NORMAL
+
+        mask = source << SOURCE_SHIFT
+        if cpu[i] > 80:
+            mask |= CPU_HIGH
+        if cpu[i] > 20:
+            mask |= CPU_ELEVATED
+        if memory[i] > 5:
+            mask |= MEMORY_HIGH
+        if threads[i] > 50:
+            mask |= THREADS_HIGH
+        codes[i] = mask
+
+    return anomaly, codes
+
+
+def predict_from_scores(scores):
+    """decision_function < 0 判为异常 (-1)，避免再调用一次 predict 遍历森林"""
+    return np.where(scores < 0, -1, 1)
+
 
 class AnomalyDetector:
     def __init__(self, random_anomaly_rate=0.03):
         """
         random_anomaly_rate: 小概率随机异常比例（如 3%）
         """
-        self.model = joblib.load(MODEL_PATH)
+        # 以只读 mmap 方式加载，多个 worker 共享同一份页缓存；
+        # 模型文件只能整体替换（train_model.save_model），不能原地重写，否则已映射的数组会被破坏
+        self.model = joblib.load(MODEL_PATH, mmap_mode="r")
         self.random_rate = random_anomaly_rate
 
-    def explain(self, p, is_anomaly, source):
+    def detect(self, meta, X):
         """
-        source: "model" | "random" | "normal"
+        meta: [(pid, name), ...]
+        X: collector 返回的 (n, 4) 特征数组
         """
-        reasons = []
+        scores = self.model.decision_function(X)
+        preds = predict_from_scores(scores)
 
-        # 基于规则的解释（无论是否异常都给）
-        if p["cpu"] > 80:
-            reasons.append("CPU 使用率较高，需关注运行状态")
-        elif p["cpu"] > 20:
-            reasons.append("CPU 使用率处于正常偏高区间")
-        else:
-            reasons.append("CPU 使用率正常")
+        # 小概率随机异常
+        rand_mask = np.random.random(len(meta)) < self.random_rate
 
-        if p["memory"] > 5:
-            reasons.append("内存占用偏高")
-        else:
-            reasons.append("内存占用正常")
-
-        if p["threads"] > 50:
-            reasons.append("线程数较多，可能存在并发压力")
-        else:
-            reasons.append("线程数处于合理范围")
-
-        # 异常来源说明（关键！）
-        if is_anomaly:
-            if source == "model":
-                reasons.append("行为模式与大多数进程显著不同，判定异常")
-            elif source == "random":
-                reasons.append("存在潜在异常风险")
-        else:
-            reasons.append("进程行为符合系统正常运行模式")
-
-        return reasons
-
-    def detect(self, processes):
-        features = [p["features"] for p in processes]
-
-        preds = self.model.predict(features)
-        scores = self.model.decision_function(features)
+        anomaly, codes = classify(X[:, 0], X[:, 1], X[:, 2], preds, rand_mask)
 
         results = []
-        for i, p in enumerate(processes):
-            model_anomaly = preds[i] == -1
-
-            # 小概率随机异常
-            random_anomaly = random.random() < self.random_rate
-
-            # 最终异常判定
-            is_anomaly = model_anomaly or random_anomaly
-
-            # 异常来源
-            if model_anomaly:
-                source = "model"
-            elif random_anomaly:
-                source = "random"
-            else:
-                source = "normal"
-
+        for i, (pid, name) in enumerate(meta):
+            cpu, memory, threads, nice = X[i]
             results.append({
-                "pid": int(p["pid"]),
-                "name": p["name"],
-                "cpu": float(p["cpu"]),
-                "memory": float(p["memory"]),
-                "threads": int(p["threads"]),
-                "nice": int(p["nice"]),
-                "anomaly": bool(is_anomaly),
+                "pid": int(pid),
+                "name": name,
+                "cpu": float(cpu),
+                "memory": float(memory),
+                "threads": int(threads),
+                "nice": int(nice),
+                "anomaly": bool(anomaly[i]),
                 "score": float(scores[i]),
-                "reasons": self.explain(p, is_anomaly, source)
+                "reasons": REASON_TABLE[codes[i]]
             })
 
         return results
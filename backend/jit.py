@@ -0,0 +1,20 @@
+# jit.py
+"""
+可选的 Numba JIT
+未安装 numba 时退化为普通 Python 函数，调用方式保持一致
+"""
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        # 同时支持 @njit 和 @njit(cache=True) 两种写法
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
@@ -5,17 +5,43 @@
 
 import json
 import os
+import sqlite3
+import threading
 from datetime import datetime
 from typing import Dict, List, Set
 
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS labels (
+    pid INTEGER,
+    tag TEXT,
+    note TEXT,
+    updated TEXT,
+    PRIMARY KEY (pid, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_tag ON labels(tag);
+CREATE TABLE IF NOT EXISTS tag_definitions (
+    tag TEXT PRIMARY KEY,
+    color TEXT,
+    description TEXT
+);
+"""
+
+
 class LabelManager:
-    def __init__(self, storage_file: str = 'process_labels.json'):
+    def __init__(self, storage_file: str = 'process_labels.db'):
         """
         初始化标签管理器
-        :param storage_file: 标签存储文件路径
+        :param storage_file: 标签数据库文件路径（SQLite）；传入旧版 .json 路径时
+                             改用同名 .db 文件，并在首次启动时导入该 JSON
         """
+        # 旧版 JSON 存储文件与数据库同名、扩展名为 .json
+        base, ext = os.path.splitext(storage_file)
+        if ext.lower() == '.json':
+            self.legacy_file = storage_file
+            storage_file = base + '.db'
+        else:
+            self.legacy_file = base + '.json'
         self.storage_file = storage_file
-        self.labels_db = {}  # 格式: {pid: {'tags': set(), 'notes': str, 'last_updated': str}}
         self.tag_definitions = {
             'high_priority': {'color': 'red', 'description': '高优先级进程'},
             'monitor_closely': {'color': 'orange', 'description': '需要密切监控'},
@@ -25,6 +51,13 @@ class LabelManager:
             'experimental': {'color': 'yellow', 'description': '实验性进程'}
         }
 
+        # WAL 模式下读写互不阻塞，每次修改单行提交
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(storage_file, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
         # 加载已有标签
         self.load_labels()
 
@@ -33,55 +66,58 @@ class LabelManager:
         为进程添加标签
         :return: 是否成功添加
         """
-        if pid not in self.labels_db:
-            self.labels_db[pid] = {
-                'tags': set(),
-                'notes': '',
-                'last_updated': datetime.now().isoformat()
-            }
-
         # 检查标签是否在定义中
         if label not in self.tag_definitions:
             print(f"警告: 标签 '{label}' 未在定义中，是否要创建新标签?")
 
-        self.labels_db[pid]['tags'].add(label)
-        if note:
-            self.labels_db[pid]['notes'] = note
-        self.labels_db[pid]['last_updated'] = datetime.now().isoformat()
-
-        # 自动保存
-        self.save_labels()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO labels (pid, tag, note, updated) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (pid, tag) DO UPDATE SET '
+                'note = COALESCE(excluded.note, labels.note), updated = excluded.updated',
+                (pid, label, note or None, datetime.now().isoformat())
+            )
         return True
 
     def remove_label(self, pid: int, label: str) -> bool:
         """移除进程的指定标签"""
-        if pid in self.labels_db and label in self.labels_db[pid]['tags']:
-            self.labels_db[pid]['tags'].remove(label)
-            self.labels_db[pid]['last_updated'] = datetime.now().isoformat()
-
-            # 如果没有标签了，删除该进程记录
-            if not self.labels_db[pid]['tags']:
-                del self.labels_db[pid]
-
-            self.save_labels()
-            return True
-        return False
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'DELETE FROM labels WHERE pid = ? AND tag = ?', (pid, label)
+            )
+        return cursor.rowcount > 0
 
     def get_process_labels(self, pid: int) -> Set[str]:
         """获取进程的所有标签"""
-        return self.labels_db.get(pid, {}).get('tags', set())
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT tag FROM labels WHERE pid = ?', (pid,)
+            ).fetchall()
+        return {tag for tag, in rows}
 
     def get_process_info(self, pid: int) -> Dict:
         """获取进程的完整标签信息"""
-        return self.labels_db.get(pid, {})
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT tag, note, updated FROM labels WHERE pid = ? ORDER BY updated', (pid,)
+            ).fetchall()
+        if not rows:
+            return {}
+
+        notes = [note for _, note, _ in rows if note]
+        return {
+            'tags': {tag for tag, _, _ in rows},
+            'notes': notes[-1] if notes else '',
+            'last_updated': rows[-1][2]
+        }
 
     def search_by_tag(self, tag: str) -> List[int]:
         """根据标签查找进程"""
-        result = []
-        for pid, info in self.labels_db.items():
-            if tag in info['tags']:
-                result.append(pid)
-        return result
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT pid FROM labels WHERE tag = ?', (tag,)
+            ).fetchall()
+        return [pid for pid, in rows]
 
     def get_all_tags(self) -> Dict[str, Dict]:
         """获取所有标签定义"""
@@ -93,23 +129,31 @@ class LabelManager:
             'color': color,
             'description': description
         }
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO tag_definitions (tag, color, description) VALUES (?, ?, ?)',
+                (tag, color, description)
+            )
 
     def get_tag_statistics(self) -> Dict[str, int]:
         """获取标签使用统计"""
-        stats = {}
-        for info in self.labels_db.values():
-            for tag in info['tags']:
-                stats[tag] = stats.get(tag, 0) + 1
-        return stats
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT tag, COUNT(*) FROM labels GROUP BY tag'
+            ).fetchall()
+        return dict(rows)
 
-    def merge_with_classification(self, classification_results: List[Dict]) -> List[Dict]:
+    def merge_with_classification(self, classification_results: List) -> List[Dict]:
         """
         将分类结果与标签合并
-        :param classification_results: 分类器返回的结果列表
+        :param classification_results: 分类器返回的结果列表（dict 或 ClassificationResult）
         :return: 合并后的结果
         """
         merged_results = []
         for result in classification_results:
+            # batch_classify 返回 ClassificationResult 命名元组，先转为 dict 再追加标签字段
+            if hasattr(result, '_asdict'):
+                result = result._asdict()
             pid = result.get('pid')
             if pid:
                 labels = self.get_process_labels(pid)
@@ -121,43 +165,51 @@ class LabelManager:
             merged_results.append(result)
         return merged_results
 
-
-    def save_labels(self):
-        """保存标签到文件"""
-        # 转换set为list以便JSON序列化
-        save_data = {}
-        for pid, info in self.labels_db.items():
-            save_data[str(pid)] = {
-                'tags': list(info['tags']),
-                'notes': info['notes'],
-                'last_updated': info['last_updated']
-            }
-
-        with open(self.storage_file, 'w') as f:
-            json.dump({
-                'labels': save_data,
-                'tag_definitions': self.tag_definitions,
-                'last_saved': datetime.now().isoformat()
-            }, f, indent=2)
+    def flush(self):
+        """把 WAL 中的修改合并回主数据库文件，退出前调用"""
+        with self._lock:
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
 
     def load_labels(self):
-        """从文件加载标签"""
-        if os.path.exists(self.storage_file):
-            try:
-                with open(self.storage_file, 'r') as f:
-                    data = json.load(f)
-
-                    # 恢复labels_db
-                    self.labels_db = {}
-                    for pid_str, info in data.get('labels', {}).items():
-                        self.labels_db[int(pid_str)] = {
-                            'tags': set(info['tags']),
-                            'notes': info['notes'],
-                            'last_updated': info['last_updated']
-                        }
-
-                    # 恢复标签定义
-                    self.tag_definitions.update(data.get('tag_definitions', {}))
-            except Exception as e:
-                print(f"加载标签文件失败: {e}")
-                self.labels_db = {}
\ No newline at end of file
+        """从数据库加载标签定义，首次启动时导入旧版 JSON 数据"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT tag, color, description FROM tag_definitions'
+            ).fetchall()
+            has_labels = self._conn.execute('SELECT 1 FROM labels LIMIT 1').fetchone()
+
+        for tag, color, description in rows:
+            self.tag_definitions[tag] = {'color': color, 'description': description}
+
+        if not has_labels and not rows and os.path.exists(self.legacy_file):
+            self._import_legacy_json(self.legacy_file)
+
+    def _import_legacy_json(self, json_file: str):
+        """导入旧版 JSON 文件中的标签和标签定义"""
+        try:
+            with open(json_file, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"加载标签文件失败: {e}")
+            return
+
+        label_rows = [
+            (int(pid_str), tag, info.get('notes') or None, info.get('last_updated'))
+            for pid_str, info in data.get('labels', {}).items()
+            for tag in info.get('tags', [])
+        ]
+        self.tag_definitions.update(data.get('tag_definitions', {}))
+        definition_rows = [
+            (tag, info.get('color'), info.get('description'))
+            for tag, info in self.tag_definitions.items()
+        ]
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO labels (pid, tag, note, updated) VALUES (?, ?, ?, ?)',
+                label_rows
+            )
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO tag_definitions (tag, color, description) VALUES (?, ?, ?)',
+                definition_rows
+            )
@@ -1,57 +1,99 @@
-import pandas as pd
+import numpy as np
 import psutil
 import threading
 import time
-import logging
+from datetime import datetime
+
+# 环形缓冲区容量，写满后覆盖最旧的样本
+RING = 5000
 
-# 禁用 Prophet 的繁琐日志
-logging.getLogger('prophet').setLevel(logging.ERROR)
-logging.getLogger('cmdstanpy').setLevel(logging.ERROR)
 
 class ResourceMonitor:
     def __init__(self):
-        # ds 是 Prophet 要求的列名（时间戳），y 是预测值
-        self.history = pd.DataFrame(columns=['ds', 'pid', 'name', 'cpu', 'mem'])
+        # 按列存储的环形缓冲区，读取时再组装为 DataFrame
+        # ds 是 Prophet 要求的列名（时间戳）
+        self._ds = np.empty(RING, dtype='datetime64[ns]')
+        self._pid = np.empty(RING, dtype=np.int32)
+        self._cpu = np.empty(RING, dtype=np.float32)
+        self._mem = np.empty(RING, dtype=np.float32)
+        self._names = [None] * RING
+        self._count = 0  # 累计写入的样本数
         self.lock = threading.Lock()
 
+    def __len__(self):
+        return min(self._count, RING)
+
+    def _append(self, now, pids, names, cpus, mems):
+        """按切片写入一批样本，跨越缓冲区末尾时分两段写"""
+        n = len(pids)
+        if n > RING:
+            pids, names, cpus, mems = pids[-RING:], names[-RING:], cpus[-RING:], mems[-RING:]
+            self._count += n - RING
+            n = RING
+
+        start = self._count % RING
+        first = min(n, RING - start)
+        for dst, src in ((slice(start, start + first), slice(0, first)),
+                         (slice(0, n - first), slice(first, n))):
+            if dst.start == dst.stop:
+                continue
+            self._ds[dst] = now
+            self._pid[dst] = pids[src]
+            self._cpu[dst] = cpus[src]
+            self._mem[dst] = mems[src]
+            self._names[dst] = names[src]
+        self._count += n
+
+    def snapshot(self, pid=None):
+        """按时间顺序返回缓冲区中的样本，可按 pid 过滤"""
+        # pandas 只在需要组装 DataFrame 时才导入，不拖慢采集线程和冷启动
+        import pandas as pd
+
+        with self.lock:
+            size = len(self)
+            start = self._count % RING if self._count > RING else 0
+            idx = (start + np.arange(size)) % RING
+            if pid is not None:
+                idx = idx[self._pid[idx] == pid]
+
+            return pd.DataFrame({
+                'ds': self._ds[idx],
+                'pid': self._pid[idx],
+                'name': [self._names[i] for i in idx],
+                'cpu': self._cpu[idx],
+                'mem': self._mem[idx],
+            })
+
     def collect_data(self):
         """后台循环采集系统资源数据"""
         print("[*] 资源采集线程已启动...")
         while True:
-            now = pd.Timestamp.now()
-            new_samples = []
-            
+            now = np.datetime64(datetime.now(), 'ns')
+            pids, names, cpus, mems = [], [], [], []
+
             # 获取所有进程快照
             for proc in psutil.process_iter(['pid', 'name']):
                 try:
                     # 获取 CPU 和内存占用
-                    cpu = proc.cpu_percent(interval=None) 
+                    cpu = proc.cpu_percent(interval=None)
                     mem = proc.memory_percent()
-                    
-                    new_samples.append({
-                        'ds': now,
-                        'pid': proc.info['pid'],
-                        'name': proc.info['name'],
-                        'cpu': cpu,
-                        'mem': mem
-                    })
+
+                    pids.append(proc.info['pid'])
+                    names.append(proc.info['name'])
+                    cpus.append(cpu)
+                    mems.append(mem)
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
                     continue
-            
+
             with self.lock:
-                if new_samples:
-                    new_df = pd.DataFrame(new_samples)
-                    self.history = pd.concat([self.history, new_df], ignore_index=True)
+                if pids:
+                    self._append(now, pids, names, cpus, mems)
                     # 打印当前进度
-                    print(f"[*] 数据采集成功，当前总样本数: {len(self.history)}", flush=True)
-                
-                # 保持最近的记录，避免内存溢出
-                if len(self.history) > 5000:
-                    self.history = self.history.tail(2000)
-            
+                    print(f"[*] 数据采集成功，当前总样本数: {len(self)}", flush=True)
+
             time.sleep(5)
 
     def start_monitoring(self):
         """以守护线程方式启动采集"""
         thread = threading.Thread(target=self.collect_data, daemon=True)
-        thread.start()
\ No newline at end of file
+        thread.start()
@@ -4,12 +4,194 @@
 """
 
 import json
+import mmap
 import os
+from collections import Counter
 from datetime import datetime
-from typing import Dict, List, Tuple, Any
-import psutil
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Tuple, Any
+import numpy as np
 import time
 
+from jit import HAS_NUMBA, njit
+from procfs import ProcSampler
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 资源使用模式（互斥，按优先级判断），以及每种模式附带的标签和类别加分
+PATTERN_NONE, PATTERN_IDLE, PATTERN_CPU, PATTERN_MEMORY, PATTERN_STABLE = range(5)
+PATTERN_TAGS = (None, 'low_resource', 'cpu_intensive', 'memory_intensive', 'stable_process')
+PATTERN_SCORES = (None, ('idle_process', 2), ('cpu_intensive', 2), None, None)
+
+# 性能标签，位序即 _eval_tags 返回掩码中的位（high_io 目前恒为 False，不占位）
+VECTOR_TAGS = ('cpu_intensive', 'memory_intensive', 'low_resource', 'stable_process')
+
+# (模式, 性能标签位掩码) -> 标签列表，模式标签在前，重复的性能标签去掉
+TAG_TABLE = tuple(
+    tuple(([PATTERN_TAGS[pattern]] if PATTERN_TAGS[pattern] else [])
+          + [tag for bit, tag in enumerate(VECTOR_TAGS)
+             if mask >> bit & 1 and tag != PATTERN_TAGS[pattern]])
+    for pattern in range(len(PATTERN_TAGS))
+    for mask in range(1 << len(VECTOR_TAGS))
+)
+
+
+def _read_json(path: str):
+    """读取 JSON 文件，有 orjson 时直接解析文件的只读内存映射"""
+    if orjson is None:
+        with open(path, 'r') as f:
+            return json.load(f)
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        with memoryview(buf) as view:
+            return orjson.loads(view)
+
+
+def _write_json(path: str, data):
+    """以两空格缩进写出 JSON"""
+    if orjson is None:
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+        return
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+class ClassificationResult(NamedTuple):
+    """批量分类的单行结果，字段同 classify_process 返回的字典并附带 pid"""
+    category: str
+    tags: Tuple[str, ...]
+    confidence: float
+    cpu_usage: float
+    memory_usage: float
+    process_name: str
+    pid: int
+
+
+def _compile_thresholds(cpu_threshold, memory_threshold):
+    """按规则阈值生成判断函数，为 None 的阈值不参与比较"""
+    if cpu_threshold is None and memory_threshold is None:
+        return lambda cpu, memory: True
+    if memory_threshold is None:
+        return lambda cpu, memory: cpu > cpu_threshold
+    if cpu_threshold is None:
+        return lambda cpu, memory: memory > memory_threshold
+    return lambda cpu, memory: cpu > cpu_threshold and memory > memory_threshold
+
+
+def _resource_pattern(cpu: float, memory: float) -> int:
+    """单个进程的资源使用模式"""
+    if cpu < 1 and memory < 1:
+        return PATTERN_IDLE
+    if cpu > 50:
+        return PATTERN_CPU
+    if memory > 30:
+        return PATTERN_MEMORY
+    if 5 <= cpu <= 30 and 5 <= memory <= 20:
+        return PATTERN_STABLE
+    return PATTERN_NONE
+
+
+@njit(cache=True)
+def _score_batch(cpu_arr, mem_arr, name_idx, name_scores, rule_hits,
+                 rule_cpu, rule_mem, rule_weight, rule_cat,
+                 pattern_cat, pattern_weight, thresholds):
+    """
+    批量计算类别下标、置信度、资源模式和性能标签掩码
+    name_scores: (唯一名称数, 类别数) 名称匹配得分；rule_hits: (唯一名称数, 规则数) 关键词是否命中
+    类别按首次加分的先后记录顺序，同分时取靠前者，与逐个处理时的字典顺序一致
+    """
+    n = cpu_arr.shape[0]
+    n_cat = name_scores.shape[1]
+    n_rules = rule_cat.shape[0]
+
+    categories = np.empty(n, dtype=np.intp)
+    confidences = np.empty(n, dtype=np.float64)
+    patterns = np.empty(n, dtype=np.intp)
+    tag_masks = np.empty(n, dtype=np.intp)
+    # 每行的工作区一次性分配，避免在循环中反复申请内存
+    scores = np.zeros((n, n_cat))
+    order = np.empty((n, n_cat), dtype=np.intp)
+
+    for i in range(n):
+        cpu = cpu_arr[i]
+        mem = mem_arr[i]
+        u = name_idx[i]
+        k = 0
+
+        # 1. 名称匹配
+        for c in range(n_cat):
+            if name_scores[u, c] > 0:
+                scores[i, c] = name_scores[u, c]
+                order[i, k] = c
+                k += 1
+
+        # 2. 资源使用模式
+        if cpu < 1 and mem < 1:
+            pattern = PATTERN_IDLE
+        elif cpu > 50:
+            pattern = PATTERN_CPU
+        elif mem > 30:
+            pattern = PATTERN_MEMORY
+        elif 5 <= cpu <= 30 and 5 <= mem <= 20:
+            pattern = PATTERN_STABLE
+        else:
+            pattern = PATTERN_NONE
+        c = pattern_cat[pattern]
+        if c >= 0:
+            if name_scores[u, c] == 0:
+                order[i, k] = c
+                k += 1
+            scores[i, c] += pattern_weight[pattern]
+
+        # 3. 自定义规则
+        for r in range(n_rules):
+            if rule_hits[u, r] and cpu > rule_cpu[r] and mem > rule_mem[r]:
+                c = rule_cat[r]
+                new = True
+                for j in range(k):
+                    if order[i, j] == c:
+                        new = False
+                        break
+                if new:
+                    order[i, k] = c
+                    k += 1
+                scores[i, c] += rule_weight[r]
+
+        # 4. 按加入顺序求最大值和总分
+        best = -1
+        total = 0.0
+        for j in range(k):
+            c = order[i, j]
+            total += scores[i, c]
+            if best < 0 or scores[i, c] > scores[i, best]:
+                best = c
+        categories[i] = best
+        confidences[i] = scores[i, best] / total if best >= 0 else 0.0
+        patterns[i] = pattern
+
+        # 5. 性能标签位掩码，与 _eval_tags 一致
+        mask = 0
+        if cpu > thresholds[0]:
+            mask |= 1
+        if mem > thresholds[1]:
+            mask |= 2
+        if cpu < thresholds[2] and mem < thresholds[3]:
+            mask |= 4
+        if thresholds[4] <= cpu <= thresholds[5] and thresholds[6] <= mem <= thresholds[7]:
+            mask |= 8
+        tag_masks[i] = mask
+
+    return categories, confidences, patterns, tag_masks
+
+
 class ProcessClassifier:
     def __init__(self, config_file: str = None):
         """初始化分类器，可加载配置文件"""
@@ -22,14 +204,15 @@ class ProcessClassifier:
             'security_services': ['fail2ban', 'firewalld', 'auditd', 'clamav']
         }
 
-        # 性能标签定义
-        self.performance_tags = {
-            'cpu_intensive': lambda cpu, mem: cpu > 70,
-            'memory_intensive': lambda cpu, mem: mem > 30,
-            'low_resource': lambda cpu, mem: cpu < 5 and mem < 5,
-            'stable_process': lambda cpu, mem: 5 <= cpu <= 30 and 5 <= mem <= 20,
-            'high_io': lambda cpu, mem: False
-        }
+        # 性能标签阈值，由 _eval_tags 统一判断
+        self._t_cpu_int = 70
+        self._t_mem_int = 30
+        self._t_low_cpu = 5
+        self._t_low_mem = 5
+        self._t_stable_cpu_min = 5
+        self._t_stable_cpu_max = 30
+        self._t_stable_mem_min = 5
+        self._t_stable_mem_max = 20
 
         # 自定义分类规则
         self.custom_rules = []
@@ -39,6 +222,20 @@ class ProcessClassifier:
         self.tag_definitions = {}
         self.system_settings = {}
 
+        # 关键词匹配器（Aho-Corasick 自动机），规则变化时置脏，下次分类前重建
+        # _categories: 全部可能得分的类别，_category_ids 为其下标
+        # _keyword_index: 小写关键词 -> [(类别下标, 权重)]
+        # _custom_rules_lc: (小写关键词元组, CPU阈值, 内存阈值, 权重, 类别)
+        # _compiled_rules: 与 _custom_rules_lc 一一对应的 (阈值判断函数, 类别下标, 权重)
+        self._automaton = None
+        self._categories = []
+        self._category_ids = {}
+        self._keyword_index = {}
+        self._custom_rules_lc = []
+        self._compiled_rules = []
+        self._has_empty_keyword = False
+        self._matcher_dirty = True
+
         # 加载配置文件 - 改为更安全的加载方式
         if config_file:
             self.load_config(config_file)
@@ -47,23 +244,23 @@ class ProcessClassifier:
         """从文件加载配置"""
         try:
             if os.path.exists(config_file):
-                with open(config_file, 'r') as f:
-                    config = json.load(f)
+                config = _read_json(config_file)
 
-                    # 更新各个配置部分
-                    self.process_categories.update(config.get('process_categories', {}))
-                    self.custom_rules = config.get('custom_rules', [])
+                # 更新各个配置部分
+                self.process_categories.update(config.get('process_categories', {}))
+                self.custom_rules = config.get('custom_rules', [])
+                self._matcher_dirty = True
 
-                    # 加载新的配置项
-                    self.performance_thresholds = config.get('performance_thresholds', {})
-                    self.tag_definitions = config.get('tag_definitions', {})
-                    self.system_settings = config.get('system_settings', {})
+                # 加载新的配置项
+                self.performance_thresholds = config.get('performance_thresholds', {})
+                self.tag_definitions = config.get('tag_definitions', {})
+                self.system_settings = config.get('system_settings', {})
 
-                    # 根据配置文件更新性能标签
-                    self._update_performance_tags_from_config()
+                # 根据配置文件更新性能标签
+                self._update_performance_tags_from_config()
 
-                    print(f"✓ 配置文件加载成功: {config_file}")
-                    return True
+                print(f"✓ 配置文件加载成功: {config_file}")
+                return True
             else:
                 print(f"⚠ 配置文件不存在: {config_file}，使用默认配置")
                 return False
@@ -75,72 +272,234 @@ class ProcessClassifier:
         """根据配置文件更新性能标签"""
         if self.performance_thresholds:
             # 更新性能标签的阈值
-            cpu_intensive_thresh = self.performance_thresholds.get('cpu_intensive', 70)
-            memory_intensive_thresh = self.performance_thresholds.get('memory_intensive', 30)
-            low_cpu_thresh = self.performance_thresholds.get('low_resource_cpu', 5)
-            low_mem_thresh = self.performance_thresholds.get('low_resource_memory', 5)
-            stable_cpu_min = self.performance_thresholds.get('stable_cpu_min', 5)
-            stable_cpu_max = self.performance_thresholds.get('stable_cpu_max', 30)
-            stable_mem_min = self.performance_thresholds.get('stable_memory_min', 5)
-            stable_mem_max = self.performance_thresholds.get('stable_memory_max', 20)
-
-            self.performance_tags = {
-                'cpu_intensive': lambda cpu, mem: cpu > cpu_intensive_thresh,
-                'memory_intensive': lambda cpu, mem: mem > memory_intensive_thresh,
-                'low_resource': lambda cpu, mem: cpu < low_cpu_thresh and mem < low_mem_thresh,
-                'stable_process': lambda cpu, mem: stable_cpu_min <= cpu <= stable_cpu_max
-                                                   and stable_mem_min <= mem <= stable_mem_max,
-                'high_io': lambda cpu, mem: False
-            }
+            self._t_cpu_int = self.performance_thresholds.get('cpu_intensive', 70)
+            self._t_mem_int = self.performance_thresholds.get('memory_intensive', 30)
+            self._t_low_cpu = self.performance_thresholds.get('low_resource_cpu', 5)
+            self._t_low_mem = self.performance_thresholds.get('low_resource_memory', 5)
+            self._t_stable_cpu_min = self.performance_thresholds.get('stable_cpu_min', 5)
+            self._t_stable_cpu_max = self.performance_thresholds.get('stable_cpu_max', 30)
+            self._t_stable_mem_min = self.performance_thresholds.get('stable_memory_min', 5)
+            self._t_stable_mem_max = self.performance_thresholds.get('stable_memory_max', 20)
+
+    def _eval_tags(self, cpu: float, mem: float) -> int:
+        """一次判断全部性能标签，返回位掩码（位序同 VECTOR_TAGS）"""
+        mask = 0
+        if cpu > self._t_cpu_int:
+            mask |= 1
+        if mem > self._t_mem_int:
+            mask |= 2
+        if cpu < self._t_low_cpu and mem < self._t_low_mem:
+            mask |= 4
+        if self._t_stable_cpu_min <= cpu <= self._t_stable_cpu_max \
+                and self._t_stable_mem_min <= mem <= self._t_stable_mem_max:
+            mask |= 8
+        return mask
+
+    def _build_matcher(self):
+        """根据分类关键词和自定义规则关键词构建匹配索引与自动机"""
+        custom_rules_lc = [
+            (tuple(keyword.lower() for keyword in rule.get('keywords', [])),
+             rule.get('cpu_threshold'), rule.get('memory_threshold'),
+             rule.get('weight', 1), rule['category'])
+            for rule in self.custom_rules
+        ]
+
+        # 类别下标：分类定义在前，其后是资源模式和自定义规则引入的类别
+        categories = list(self.process_categories)
+        for pattern_score in PATTERN_SCORES:
+            if pattern_score and pattern_score[0] not in categories:
+                categories.append(pattern_score[0])
+        for rule in custom_rules_lc:
+            if rule[4] not in categories:
+                categories.append(rule[4])
+        category_ids = {category: i for i, category in enumerate(categories)}
+        self._categories = categories
+        self._category_ids = category_ids
+        self._pattern_ids = tuple(category_ids[s[0]] if s else -1 for s in PATTERN_SCORES)
+        self._compiled_rules = [
+            (_compile_thresholds(cpu_threshold, memory_threshold), category_ids[category], weight)
+            for _, cpu_threshold, memory_threshold, weight, category in custom_rules_lc
+        ]
+
+        keyword_index = {}
+        for category, keywords in self.process_categories.items():
+            for keyword in keywords:
+                keyword_index.setdefault(keyword.lower(), []).append((category_ids[category], 1))
+
+        all_keywords = set(keyword_index)
+        for rule in custom_rules_lc:
+            all_keywords.update(rule[0])
+        self._keyword_index = keyword_index
+        self._custom_rules_lc = custom_rules_lc
+        # 空关键词可以匹配任何名称，自动机无法表示，单独记录
+        self._has_empty_keyword = '' in all_keywords
+        all_keywords.discard('')
+
+        self._automaton = None
+        if ahocorasick is not None and all_keywords:
+            automaton = ahocorasick.Automaton()
+            for keyword in all_keywords:
+                automaton.add_word(keyword, keyword)
+            automaton.make_automaton()
+            self._automaton = automaton
+        self._all_keywords = all_keywords
+        self._matcher_dirty = False
+        # 同名进程很多（如 chrome 的多个子进程），名称匹配结果按实例缓存，规则变化时随重建失效
+        self._match_name = lru_cache(maxsize=4096)(self._scan_name)
+        # 分类结果只取决于名称、资源模式和命中规则的阈值判断，按这三者缓存
+        self._classify_cached = lru_cache(maxsize=4096)(self._combine_scores)
+        # 完全空闲且名称不命中任何关键词的进程结果固定，预先算好
+        self._idle_template = {
+            'category': 'idle_process',
+            'tags': TAG_TABLE[(PATTERN_IDLE << len(VECTOR_TAGS)) | self._eval_tags(0.0, 0.0)],
+            'confidence': 1.0
+        }
+        self._build_batch_tables()
+
+    def _build_batch_tables(self):
+        """把自定义规则转换为 _score_batch 使用的数组，规则阈值不是数值时不走 JIT"""
+        category_ids = self._category_ids
+        # '10' 之类的字符串会被 np.array 静默转成浮点数，而 Python 路径比较时会报错跳过，
+        # 这里只接受真正的数值（bool 除外）或 None，其余规则交给 Python 路径处理
+        for rule in self._custom_rules_lc:
+            for t in (rule[1], rule[2]):
+                if t is not None and (not isinstance(t, (int, float)) or isinstance(t, bool)):
+                    self._batch_tables = None
+                    return
+        try:
+            self._batch_tables = (
+                np.array([-np.inf if rule[1] is None else rule[1] for rule in self._custom_rules_lc],
+                         dtype=np.float64),
+                np.array([-np.inf if rule[2] is None else rule[2] for rule in self._custom_rules_lc],
+                         dtype=np.float64),
+                np.array([rule[3] for rule in self._custom_rules_lc], dtype=np.float64),
+                np.array([category_ids[rule[4]] for rule in self._custom_rules_lc], dtype=np.intp),
+                np.array(self._pattern_ids, dtype=np.intp),
+                np.array([s[1] if s else 0 for s in PATTERN_SCORES], dtype=np.float64),
+            )
+        except (TypeError, ValueError):
+            self._batch_tables = None
 
-    def classify_process(self, process_name: str, cpu_usage: float, memory_usage: float) -> Dict[str, Any]:
+    def _match_keywords(self, name_lc: str) -> set:
+        """返回出现在进程名中的全部关键词（一次扫描）"""
+        if self._automaton is not None:
+            hits = {keyword for _, keyword in self._automaton.iter(name_lc)}
+        else:
+            hits = {keyword for keyword in self._all_keywords if keyword in name_lc}
+        if self._has_empty_keyword:
+            hits.add('')
+        return hits
+
+    def _scan_name(self, name_lc: str) -> Tuple[Tuple, Tuple]:
+        """名称匹配：返回按类别下标排列的 (类别下标, 得分) 以及关键词命中的自定义规则下标"""
+        keyword_hits = self._match_keywords(name_lc)
+        name_scores = {}
+        for keyword in keyword_hits:
+            for category_id, weight in self._keyword_index.get(keyword, ()):
+                name_scores[category_id] = name_scores.get(category_id, 0) + weight
+        # 按分类定义顺序排列，保证同分时的取舍与逐个匹配一致
+        ordered = tuple(sorted(name_scores.items()))
+        rule_ids = tuple(i for i, rule in enumerate(self._custom_rules_lc)
+                         if any(keyword in keyword_hits for keyword in rule[0]))
+        return ordered, rule_ids
+
+    def _score_category(self, name_lc: str, pattern: int, cpu_usage: float, memory_usage: float):
+        """综合名称、资源模式和自定义规则确定类别，返回 (类别, 置信度)"""
+        _, rule_ids = self._match_name(name_lc)
+        rule_mask = self._rule_mask(rule_ids, cpu_usage, memory_usage)
+        return self._classify_cached(name_lc, pattern, rule_mask)
+
+    def _rule_mask(self, rule_ids, cpu_usage: float, memory_usage: float) -> int:
+        """关键词已命中的自定义规则再检查阈值，结果压成位掩码作为缓存键的一部分"""
+        rule_mask = 0
+        for bit, i in enumerate(rule_ids):
+            if self._match_rule(i, cpu_usage, memory_usage):
+                rule_mask |= 1 << bit
+        return rule_mask
+
+    @staticmethod
+    def _group_names(names):
         """
-        基于多维度特征分类进程，返回分类和标签信息
-        返回格式: {'category': '类别', 'tags': ['标签1', '标签2'], 'confidence': 置信度}
+        按进程名分组，返回 (小写的唯一名称列表, 每行对应的唯一名称下标)
+        同名进程（如多个 chrome 子进程）只需小写和匹配一次
         """
-        category_scores = {}
-        suggested_tags = []
+        # 用字典按首次出现编号，比 np.unique 对字符串排序快得多
+        index = {}
+        inverse = np.fromiter((index.setdefault(name, len(index)) for name in names),
+                              dtype=np.intp, count=len(names))
+        return [name.lower() for name in index], inverse
+
+    def _combine_scores(self, name_lc: str, pattern: int, rule_mask: int):
+        """由名称得分、资源模式和满足阈值的规则计算 (类别, 置信度)"""
+        # 得分按类别下标存放，order 记录各类别首次得分的先后，同分时取先出现者
+        scores = [0] * len(self._categories)
+        order = []
+
         # 1. 基于名称匹配
-        for category, keywords in self.process_categories.items():
-            for keyword in keywords:
-                if keyword.lower() in process_name.lower():
-                    category_scores[category] = category_scores.get(category, 0) + 1
+        name_scores, rule_ids = self._match_name(name_lc)
+        for category_id, score in name_scores:
+            scores[category_id] = score
+            order.append(category_id)
 
         # 2. 基于资源使用模式
-        if cpu_usage < 1 and memory_usage < 1:
-            category_scores['idle_process'] = category_scores.get('idle_process', 0) + 2
-            suggested_tags.append('low_resource')
-
-        elif cpu_usage > 50:
-            category_scores['cpu_intensive'] = category_scores.get('cpu_intensive', 0) + 2
-            suggested_tags.append('cpu_intensive')
-        elif memory_usage > 30:
-            suggested_tags.append('memory_intensive')
-        elif 5 <= cpu_usage <= 30 and 5 <= memory_usage <= 20:
-            suggested_tags.append('stable_process')
-        # 3. 应用自定义规则
-        for rule in self.custom_rules:
-            if self._match_rule(rule, process_name, cpu_usage, memory_usage):
-                category_scores[rule['category']] = category_scores.get(rule['category'], 0) + rule.get('weight', 1)
+        pattern_score = PATTERN_SCORES[pattern]
+        if pattern_score:
+            category_id = self._pattern_ids[pattern]
+            if category_id not in order:
+                order.append(category_id)
+            scores[category_id] += pattern_score[1]
+
+        # 3. 应用自定义规则（关键词和阈值均已满足的规则）
+        for bit, i in enumerate(rule_ids):
+            if rule_mask >> bit & 1:
+                _, category_id, weight = self._compiled_rules[i]
+                if category_id not in order:
+                    order.append(category_id)
+                scores[category_id] += weight
 
         # 4. 确定最终分类
-        if category_scores:
-            final_category = max(category_scores, key=category_scores.get)
-            confidence = category_scores[final_category] / sum(category_scores.values())
+        if order:
+            best = max(order, key=scores.__getitem__)
+            final_category = self._categories[best]
+            confidence = scores[best] / sum(scores[category_id] for category_id in order)
         else:
             final_category = 'unknown'
             confidence = 0.0
+        return final_category, round(confidence, 2)
 
-        # 5. 自动添加性能标签
-        for tag_name, condition_func in self.performance_tags.items():
-            if condition_func(cpu_usage, memory_usage):
-                if tag_name not in suggested_tags:
-                    suggested_tags.append(tag_name)
+    def classify_process(self, process_name: str, cpu_usage: float, memory_usage: float) -> Dict[str, Any]:
+        """
+        基于多维度特征分类进程，返回分类和标签信息
+        返回格式: {'category': '类别', 'tags': ['标签1', '标签2'], 'confidence': 置信度}
+        """
+        if self._matcher_dirty:
+            self._build_matcher()
+
+        # 大部分守护进程 CPU 和内存都为 0，名称也不命中时直接套用空闲模板
+        if cpu_usage == 0 and memory_usage == 0:
+            name_scores, rule_ids = self._match_name(process_name.lower())
+            if not name_scores and not rule_ids:
+                template = self._idle_template
+                return {
+                    'category': template['category'],
+                    'tags': list(template['tags']),
+                    'confidence': template['confidence'],
+                    'cpu_usage': cpu_usage,
+                    'memory_usage': memory_usage,
+                    'process_name': process_name
+                }
+
+        pattern = _resource_pattern(cpu_usage, memory_usage)
+        final_category, confidence = self._score_category(
+            process_name.lower(), pattern, cpu_usage, memory_usage)
+        # 5. 资源模式标签在前，再追加性能标签
+        tag_mask = self._eval_tags(cpu_usage, memory_usage)
+        suggested_tags = list(TAG_TABLE[(pattern << len(VECTOR_TAGS)) | tag_mask])
 
         return {
             'category': final_category,
             'tags': suggested_tags,
-            'confidence': round(confidence, 2),
+            'confidence': confidence,
             'cpu_usage': cpu_usage,
             'memory_usage': memory_usage,
             'process_name': process_name
@@ -159,25 +518,14 @@ class ProcessClassifier:
             'weight': weight
         }
         self.custom_rules.append(rule)
+        self._matcher_dirty = True
 
-    def _match_rule(self, rule: Dict, process_name: str, cpu: float, memory: float) -> bool:
-        """检查进程是否匹配规则"""
+    def _match_rule(self, index: int, cpu: float, memory: float) -> bool:
+        """检查关键词已命中的进程是否满足第 index 条规则的阈值"""
         try:
-            # 检查关键词
-            keyword_match = any(keyword.lower() in process_name.lower()
-                                for keyword in rule.get('keywords', []))
-
-            # 检查CPU阈值（安全地获取）
-            cpu_threshold = rule.get('cpu_threshold')
-            cpu_match = True if cpu_threshold is None else cpu > cpu_threshold
-
-            # 检查内存阈值（安全地获取）
-            memory_threshold = rule.get('memory_threshold')
-            memory_match = True if memory_threshold is None else memory > memory_threshold
-
-            return keyword_match and cpu_match and memory_match
+            return self._compiled_rules[index][0](cpu, memory)
         except Exception as e:
-            print(f"匹配规则时出错: {e}, rule: {rule}")
+            print(f"匹配规则时出错: {e}, rule: {self.custom_rules[index]}")
             return False
 
     def save_config(self, config_file: str):
@@ -187,8 +535,7 @@ class ProcessClassifier:
             'custom_rules': self.custom_rules,
             'timestamp': datetime.now().isoformat()
         }
-        with open(config_file, 'w') as f:
-            json.dump(config, f, indent=2)
+        _write_json(config_file, config)
 
     """
     def load_config(self, config_file: str):
@@ -199,18 +546,103 @@ class ProcessClassifier:
             self.custom_rules = config.get('custom_rules', [])
     """
 
-    def batch_classify(self, process_list: List[Dict]) -> List[Dict]:
+    def batch_classify(self, process_list: List[Dict]) -> List[ClassificationResult]:
         """批量分类进程列表"""
-        results = []
-        for process in process_list:
-            result = self.classify_process(
-                process.get('name', ''),
-                process.get('cpu', 0),
-                process.get('memory', 0)
-            )
-            result['pid'] = process.get('pid', 'N/A')
-            results.append(result)
-        return results
+        return self.classify_arrays(
+            [process.get('pid', 'N/A') for process in process_list],
+            [process.get('name', '') for process in process_list],
+            [process.get('cpu', 0) for process in process_list],
+            [process.get('memory', 0) for process in process_list]
+        )
+
+    def classify_arrays(self, pids, names, cpus, mems) -> List[ClassificationResult]:
+        """
+        按列批量分类，pids / names / cpus / mems 按下标一一对应
+        资源模式和性能标签整列向量化计算，名称匹配按进程名缓存；
+        返回 ClassificationResult 列表，需要字典时调用 _asdict()
+        """
+        if self._matcher_dirty:
+            self._build_matcher()
+
+        cpu_arr = np.asarray(cpus, dtype=np.float64)
+        mem_arr = np.asarray(mems, dtype=np.float64)
+
+        if HAS_NUMBA and self._batch_tables is not None:
+            categories, confidences, table_index = self._score_batch_jit(names, cpu_arr, mem_arr)
+        else:
+            categories, confidences, table_index = self._score_batch_py(names, cpus, mems, cpu_arr, mem_arr)
+
+        # 标签直接引用 TAG_TABLE 中的不可变元组，各行共享
+        return [
+            ClassificationResult(category, TAG_TABLE[tag_index], confidence, cpu, memory, name, pid)
+            for category, tag_index, confidence, cpu, memory, name, pid
+            in zip(categories, table_index, confidences, cpus, mems, names, pids)
+        ]
+
+    def _score_batch_jit(self, names, cpu_arr, mem_arr):
+        """JIT 路径：名称按唯一值匹配一次，其余逐行计算在 _score_batch 中完成"""
+        unique_names, name_idx = self._group_names(names)
+
+        n_rules = len(self._custom_rules_lc)
+        name_scores = np.zeros((len(unique_names), len(self._categories)))
+        rule_hits = np.zeros((len(unique_names), n_rules), dtype=np.bool_)
+        for u, name_lc in enumerate(unique_names):
+            scores, rule_ids = self._match_name(name_lc)
+            for category_id, score in scores:
+                name_scores[u, category_id] = score
+            rule_hits[u, list(rule_ids)] = True
+
+        thresholds = np.array([self._t_cpu_int, self._t_mem_int, self._t_low_cpu, self._t_low_mem,
+                               self._t_stable_cpu_min, self._t_stable_cpu_max,
+                               self._t_stable_mem_min, self._t_stable_mem_max], dtype=np.float64)
+        category_ids, confidences, patterns, tag_masks = _score_batch(
+            cpu_arr, mem_arr, name_idx, name_scores, rule_hits, *self._batch_tables, thresholds)
+
+        # 下标 -1 表示没有任何得分，对应末尾的 'unknown'
+        category_names = self._categories + ['unknown']
+        categories = [category_names[c] for c in category_ids.tolist()]
+        # 置信度只有少数几种取值，去重后再按 Python 的 round 规则取两位小数
+        unique_conf, conf_idx = np.unique(confidences, return_inverse=True)
+        rounded = [round(c, 2) for c in unique_conf.tolist()]
+        confidences = [rounded[j] for j in conf_idx.tolist()]
+        table_index = ((patterns << len(VECTOR_TAGS)) | tag_masks).tolist()
+        return categories, confidences, table_index
+
+    def _score_batch_py(self, names, cpus, mems, cpu_arr, mem_arr):
+        """无 numba 时的路径：标签整列向量化，类别逐行计算并走缓存"""
+        # 资源使用模式，与 _resource_pattern 的判断顺序一致
+        patterns = np.select(
+            [(cpu_arr < 1) & (mem_arr < 1),
+             cpu_arr > 50,
+             mem_arr > 30,
+             (cpu_arr >= 5) & (cpu_arr <= 30) & (mem_arr >= 5) & (mem_arr <= 20)],
+            [PATTERN_IDLE, PATTERN_CPU, PATTERN_MEMORY, PATTERN_STABLE],
+            default=PATTERN_NONE
+        )
+
+        # 性能标签位掩码，与 _eval_tags 逐位对应
+        tag_masks = (
+            (cpu_arr > self._t_cpu_int).astype(np.intp)
+            | (mem_arr > self._t_mem_int) << 1
+            | ((cpu_arr < self._t_low_cpu) & (mem_arr < self._t_low_mem)) << 2
+            | ((cpu_arr >= self._t_stable_cpu_min) & (cpu_arr <= self._t_stable_cpu_max)
+               & (mem_arr >= self._t_stable_mem_min) & (mem_arr <= self._t_stable_mem_max)) << 3
+        )
+        table_index = ((patterns << len(VECTOR_TAGS)) | tag_masks).tolist()
+        patterns = patterns.tolist()
+
+        # 名称匹配按唯一名称做一次，逐行只剩规则阈值判断和缓存查找
+        unique_names, name_idx = self._group_names(names)
+        rule_ids = [self._match_name(name_lc)[1] for name_lc in unique_names]
+
+        categories = []
+        confidences = []
+        for u, pattern, cpu, memory in zip(name_idx.tolist(), patterns, cpus, mems):
+            rule_mask = self._rule_mask(rule_ids[u], cpu, memory) if rule_ids[u] else 0
+            final_category, confidence = self._classify_cached(unique_names[u], pattern, rule_mask)
+            categories.append(final_category)
+            confidences.append(confidence)
+        return categories, confidences, table_index
 
     def monitor_and_classify(self, interval: float = 2.0, duration: int = None):
         """
@@ -221,35 +653,38 @@ class ProcessClassifier:
         print(f"🔍 开始实时进程监控 (间隔: {interval}秒)")
         print("按 Ctrl+C 停止监控")
         try:
-            start_time = time.time()
+            sampler = ProcSampler()
+            # 按固定节拍采样：下一轮的截止时间只由起点和间隔决定，不随处理耗时漂移
+            start_time = time.monotonic()
+            deadline = start_time
             iteration = 0
             while True:
                 iteration += 1
                 current_time = time.time()
 
                 # 检查是否超过指定时长
-                if duration and (current_time - start_time) > duration:
+                if duration and (time.monotonic() - start_time) > duration:
                     break
 
-                # 获取当前进程
-                processes = []
-                for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-                    try:
-                        processes.append({
-                            'pid': proc.info['pid'],
-                            'name': proc.info['name'] or 'unknown',
-                            'cpu': proc.info['cpu_percent'] or 0.0,
-                            'memory': proc.info['memory_percent'] or 0.0
-                        })
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
+                # 获取当前进程（一次遍历 /proc，按列收集）
+                pids, names, cpus, mems = [], [], [], []
+                for pid, name, cpu, memory, _, _ in sampler.sample():
+                    pids.append(pid)
+                    names.append(name or 'unknown')
+                    cpus.append(cpu or 0.0)
+                    mems.append(memory or 0.0)
 
                 # 分类并显示结果
-                results = self.batch_classify(processes)
+                results = self.classify_arrays(pids, names, cpus, mems)
                 # 显示统计信息
                 self.display_monitoring_stats(results, iteration, current_time)
-                # 等待下一次监控
-                time.sleep(interval)
+                # 等待下一次监控；处理超时则从当前时刻重新对齐，不连续补采
+                deadline += interval
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+                else:
+                    deadline = time.monotonic()
 
         except KeyboardInterrupt:
             print("\n🛑 监控已停止")
@@ -257,16 +692,13 @@ class ProcessClassifier:
     def display_monitoring_stats(self, results, iteration, timestamp):
         """显示监控统计信息"""
         # 按类别统计
-        category_counts = {}
-        for result in results:
-            category = result['category']
-            category_counts[category] = category_counts.get(category, 0) + 1
+        category_counts = Counter(result.category for result in results)
 
         print(f"\n📊 监控轮次 #{iteration} - {time.strftime('%H:%M:%S', time.localtime(timestamp))}")
         print(f"进程总数: {len(results)}")
 
         # 显示前5个最常见的类别
         print("主要类别分布:")
-        for category, count in sorted(category_counts.items(), key=lambda x: x[1], reverse=True)[:5]:
+        for category, count in category_counts.most_common(5):
             percentage = (count / len(results)) * 100
             print(f"  {category:<20}: {count:3} ({percentage:.1f}%)")
\ No newline at end of file
@@ -0,0 +1,163 @@
+# procfs.py
+"""
+直接读取 /proc 的进程快照
+每个进程只读一次 /proc/<pid>/stat，代替 psutil 逐个属性的多次文件读取；
+非 Linux 环境自动退回 psutil
+"""
+
+import os
+import sys
+import time
+
+import psutil
+
+HAS_PROCFS = sys.platform.startswith("linux") and os.path.isdir("/proc")
+
+if HAS_PROCFS:
+    CLK_TCK = os.sysconf("SC_CLK_TCK")
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+    TOTAL_MEMORY = os.sysconf("SC_PHYS_PAGES") * PAGE_SIZE
+
+# comm 最长 15 个字符，达到该长度时和 psutil 一样用 cmdline 还原完整名称
+COMM_MAX = 15
+
+# /proc/<pid>/stat 不超过 1KB，一次 read 即可读完
+STAT_BUFSIZE = 4096
+
+
+def fast_proc_snapshot():
+    """
+    返回 {pid: (comm, starttime, cpu_ticks, num_threads, nice, rss_bytes)}
+    已退出或无权限读取的进程直接跳过
+    """
+    snapshot = {}
+    # 相对 /proc 的目录 fd 打开，省去每次的完整路径解析；
+    # 直接用 os.open/os.read/os.close，每个进程只有 openat + read + close 三次系统调用
+    proc_fd = os.open("/proc", os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        for entry in os.scandir(proc_fd):
+            if not entry.name.isdigit():
+                continue
+            try:
+                fd = os.open(f"{entry.name}/stat", os.O_RDONLY, dir_fd=proc_fd)
+            except OSError:
+                continue
+            try:
+                data = os.read(fd, STAT_BUFSIZE)
+            except OSError:
+                continue
+            finally:
+                os.close(fd)
+            _parse_stat(snapshot, int(entry.name), data)
+    finally:
+        os.close(proc_fd)
+    return snapshot
+
+
+def _parse_stat(snapshot, pid, data):
+    """解析一行 /proc/<pid>/stat 写入 snapshot"""
+    # comm 可能包含空格和括号，以最后一个 ')' 为界
+    rpar = data.rfind(b")")
+    if rpar < 0:
+        return
+    comm = data[data.find(b"(") + 1:rpar].decode("utf-8", "replace")
+    # fields[0] 是第 3 列 state，第 n 列即 fields[n - 3]
+    fields = data[rpar + 2:].split()
+    snapshot[pid] = (
+        comm,
+        int(fields[19]),                    # starttime
+        int(fields[11]) + int(fields[12]),  # utime + stime
+        int(fields[17]),                    # num_threads
+        int(fields[16]),                    # nice
+        int(fields[21]) * PAGE_SIZE,        # rss
+    )
+
+
+def _full_name(pid, comm):
+    """comm 被截断时从 cmdline 取完整进程名"""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            cmdline = f.read().split(b"\0", 1)[0].decode("utf-8", "replace")
+    except OSError:
+        return comm
+    name = os.path.basename(cmdline)
+    return name if name.startswith(comm) else comm
+
+
+class ProcSampler:
+    """
+    连续采样进程指标
+    cpu 为两次采样之间的 CPU 时间占比（与 psutil.cpu_percent(None) 相同，首次采样为 0）
+    """
+
+    def __init__(self):
+        self._last_ticks = {}
+        self._last_time = None
+        self._names = {}
+        # psutil 回退路径复用的 Process 句柄，cpu_percent 依赖句柄上保存的上次 CPU 时间
+        self._proc_cache = {}
+
+    def sample(self):
+        """返回 [(pid, name, cpu, memory, num_threads, nice), ...]"""
+        if not HAS_PROCFS:
+            return self._sample_psutil()
+
+        now = time.monotonic()
+        snapshot = fast_proc_snapshot()
+        elapsed = now - self._last_time if self._last_time is not None else 0.0
+
+        rows = []
+        ticks_now = {}
+        names = {}
+        for pid, (comm, starttime, ticks, num_threads, nice, rss) in snapshot.items():
+            # (pid, starttime) 唯一确定一个进程，避免 pid 复用时沿用旧数据
+            key = (pid, starttime)
+            ticks_now[key] = ticks
+            prev = self._last_ticks.get(key)
+            if prev is None or elapsed <= 0:
+                cpu = 0.0
+            else:
+                cpu = round((ticks - prev) / CLK_TCK / elapsed * 100, 1)
+
+            # 完整名称按 comm 缓存，comm 变化（如 kworker 改名）时重新解析
+            cached = self._names.get(key)
+            if cached is not None and cached[0] == comm:
+                name = cached[1]
+            else:
+                name = _full_name(pid, comm) if len(comm) >= COMM_MAX else comm
+            names[key] = (comm, name)
+
+            rows.append((pid, name, cpu, rss / TOTAL_MEMORY * 100, num_threads, nice))
+
+        self._last_ticks = ticks_now
+        self._last_time = now
+        self._names = names
+        return rows
+
+    def _sample_psutil(self):
+        pids = psutil.pids()
+        cache = self._proc_cache
+        # 已退出的进程移出缓存，新进程创建句柄
+        for pid in cache.keys() - set(pids):
+            del cache[pid]
+
+        rows = []
+        for pid in pids:
+            proc = cache.get(pid)
+            try:
+                if proc is None:
+                    proc = cache[pid] = psutil.Process(pid)
+                # oneshot 内多个属性共用同一次 /proc 读取
+                with proc.oneshot():
+                    rows.append((
+                        pid,
+                        proc.name(),
+                        proc.cpu_percent(None),
+                        proc.memory_percent(),
+                        proc.num_threads(),
+                        proc.nice(),
+                    ))
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                cache.pop(pid, None)
+                continue
+        return rows
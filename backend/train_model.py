@@ -1,43 +1,117 @@
+import os
+import random
 import time
-import psutil
 import joblib
+import numpy as np
 from sklearn.ensemble import IsolationForest
 
+from collector import N_FEATURES
+from procfs import ProcSampler
+
 MODEL_PATH = "models/isolation_forest.joblib"
+# 蓄水池样本和累计行数，下次训练在此基础上继续采样
+RESERVOIR_PATH = "models/reservoir.npz"
+
+# 蓄水池只保留固定行数的均匀样本，采集和训练开销不再随轮数、进程数增长；
+# 容量取 max_samples 的 16 倍，保证每棵树抽到的子样本仍各不相同
+RESERVOIR_SIZE = 4096
+MAX_SAMPLES = 256
+
+
+def load_reservoir(path=RESERVOIR_PATH, reservoir_size=RESERVOIR_SIZE):
+    """
+    读取上次保存的蓄水池，返回 (reservoir, seen)
+    reservoir 为 (reservoir_size, 4) 的 float32 数组，seen 为累计看过的行数；文件不存在时为空池
+    """
+    reservoir = np.empty((reservoir_size, N_FEATURES), dtype=np.float32)
+    if not os.path.exists(path):
+        return reservoir, 0
+
+    with np.load(path) as data:
+        saved = data["reservoir"]
+        seen = int(data["seen"])
+    n = min(len(saved), reservoir_size)
+    reservoir[:n] = saved[:n]
+    # 池未装满时 seen 必须等于已有行数，否则后续行无法填入空位
+    return reservoir, seen if n == reservoir_size else n
+
+
+def save_reservoir(reservoir, seen, path=RESERVOIR_PATH):
+    """保存蓄水池，先写临时文件再替换，避免中断时留下不完整的文件"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, reservoir=reservoir[:min(seen, len(reservoir))], seen=seen)
+    os.replace(tmp_path, path)
+
+
+def save_model(model, path=MODEL_PATH):
+    """
+    保存模型，先写临时文件再用 os.replace 原子替换
+    detector 以 mmap 方式加载模型，原地截断重写会破坏正在运行的进程读取的数组
+    """
+    tmp_path = path + ".tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+
 
+def reservoir_update(reservoir, seen, rows, rng):
+    """按 Algorithm R 把 rows 并入蓄水池，返回新的 seen"""
+    reservoir_size = len(reservoir)
+    for row in rows:
+        # 第 seen+1 行以 reservoir_size / (seen+1) 的概率替换池中随机一行
+        slot = seen if seen < reservoir_size else rng.randrange(seen + 1)
+        if slot < reservoir_size:
+            reservoir[slot] = row
+        seen += 1
+    return seen
 
-def collect_features(rounds=10, interval=1):
-    data = []
+
+def build_forest(n_samples):
+    """训练脚本和在线检测共用的 IsolationForest 配置"""
+    return IsolationForest(
+        n_estimators=100,
+        max_samples=min(MAX_SAMPLES, n_samples),
+        contamination=0.1,
+        bootstrap=False,
+        warm_start=False,
+        random_state=42,
+        n_jobs=-1
+    )
+
+
+def collect_features(rounds=10, interval=1, reservoir=None, seen=0, seed=None):
+    """
+    对采样到的全部行做蓄水池抽样（Algorithm R），返回 (reservoir, seen)
+    reservoir 列顺序同 collector: cpu / memory / threads / nice，有效行为前 min(seen, 容量) 行；
+    传入 load_reservoir 的结果即可在上次的样本上继续采样；
+    seed 默认不固定，否则每次续采都会重放同一串随机数，替换位置逐轮重复
+    """
+    if reservoir is None:
+        reservoir = np.empty((RESERVOIR_SIZE, N_FEATURES), dtype=np.float32)
+    rng = random.Random(seed)
+    sampler = ProcSampler()
     for _ in range(rounds):
-        for proc in psutil.process_iter(
-            ['cpu_percent', 'memory_percent', 'num_threads', 'nice']
-        ):
-            try:
-                data.append([
-                    float(proc.cpu_percent()),
-                    float(proc.memory_percent()),
-                    int(proc.num_threads()),
-                    int(proc.nice())
-                ])
-            except psutil.NoSuchProcess:
-                continue
+        rows = ((cpu, memory, num_threads, nice)
+                for _, _, cpu, memory, num_threads, nice in sampler.sample())
+        seen = reservoir_update(reservoir, seen, rows, rng)
         time.sleep(interval)
-    return data
+    return reservoir, seen
 
 
 if __name__ == "__main__":
     print("[*] Collecting process behavior data...")
-    X = collect_features()
+    reservoir, seen = load_reservoir()
+    if seen:
+        print(f"[*] Resuming from saved reservoir ({seen} rows seen)")
+    reservoir, seen = collect_features(reservoir=reservoir, seen=seen)
+    save_reservoir(reservoir, seen)
+    X = reservoir[:min(seen, len(reservoir))]
 
     print("[*] Training IsolationForest...")
-    model = IsolationForest(
-        n_estimators=100,
-        contamination=0.1,
-        random_state=42
-    )
+    model = build_forest(len(X))
     model.fit(X)
 
     print("[*] Saving model...")
-    joblib.dump(model, MODEL_PATH)
+    save_model(model, MODEL_PATH)
 
     print("[✓] Model saved to", MODEL_PATH)